@@ -0,0 +1,111 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class IdempotencyCache:
+    """
+    A bounded cache of recent idempotency keys and the results they produced.
+
+    Each key remembers a fingerprint of its request, so reusing a key for a
+    different request is refused, and a key is reserved while its request runs,
+    so a concurrent retry cannot run it a second time. Results expire after a
+    time-to-live and the oldest results are evicted once the cache is full, so
+    memory stays flat under sustained load. Reservations are never evicted;
+    there is at most one per request in flight.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a new cache.
+        max_size (int): The maximum number of completed keys kept.
+        ttl (float): How many seconds a key is remembered.
+        clock (Callable): The time source, in seconds.
+        """
+        if max_size <= 0 or ttl <= 0:
+            raise ValueError("Invalid parameters for creating an IdempotencyCache.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = Lock()
+        # Completed keys: (expires, fingerprint, result), oldest first.
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Reserved keys whose request is still running: fingerprint.
+        self._in_flight: Dict[Hashable, Hashable] = {}
+
+    def reserve(self, key: Hashable, fingerprint: Hashable = None) -> Optional[Any]:
+        """
+        Claim a key for a new request, or get the result of its earlier run.
+        key (Hashable): The idempotency key.
+        fingerprint (Hashable): Identifies the request the key is used for.
+        return: The stored result, or None if the key is now reserved for the caller.
+        Raises:
+            ValueError: If the key was used for a request with another fingerprint.
+            RuntimeError: If the request of this key is still running.
+        """
+        with self._lock:
+            self._evict_expired()
+            if key in self._in_flight:
+                if self._in_flight[key] != fingerprint:
+                    raise ValueError(f"Idempotency key {key!r} was already used for a different request.")
+                raise RuntimeError(f"The request with idempotency key {key!r} is still being processed.")
+            entry = self._entries.get(key)
+            if entry is None:
+                self._in_flight[key] = fingerprint
+                return None
+            _, stored_fingerprint, result = entry
+            if stored_fingerprint != fingerprint:
+                raise ValueError(f"Idempotency key {key!r} was already used for a different request.")
+            return result
+
+    def complete(self, key: Hashable, result: Any):
+        """
+        Store the result of a reserved key, under the fingerprint it was reserved with.
+        key (Hashable): The idempotency key.
+        result: The result to return for retries of the same request.
+        Raises:
+            KeyError: If the key is not reserved.
+        """
+        with self._lock:
+            fingerprint = self._in_flight.pop(key)
+            self._entries[key] = (self._clock() + self.ttl, fingerprint, result)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def release(self, key: Hashable):
+        """
+        Drop the reservation of a key whose request failed, so it can be retried.
+        key (Hashable): The idempotency key.
+        """
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get the result stored for a key, if it has completed and not expired.
+        key (Hashable): The idempotency key.
+        """
+        with self._lock:
+            self._evict_expired()
+            entry = self._entries.get(key)
+            return default if entry is None else entry[2]
+
+    def _evict_expired(self):
+        """Drop expired keys. Keys are kept in insertion order, so the oldest come first."""
+        now = self._clock()
+        while self._entries:
+            key, (expires, _, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[key]
+
+    def __contains__(self, key):
+        """Check if a key is reserved, or remembered and not expired."""
+        with self._lock:
+            self._evict_expired()
+            return key in self._in_flight or key in self._entries
+
+    def __len__(self):
+        """Return the number of reserved and remembered keys."""
+        return len(self._in_flight) + len(self._entries)
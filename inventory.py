@@ -0,0 +1,325 @@
+from bisect import insort
+from copy import copy
+from typing import Dict, List, Optional, Tuple
+from weakref import ref
+from products import Product
+
+FEWEST_SHIPMENTS = "fewest"
+NEAREST_FIRST = "nearest"
+
+
+class Warehouse:
+    """
+    A class representing a stocking location.
+
+    The warehouse owns its physical stock. Inventories that include it are told
+    about every change, so a warehouse can be shared by several inventories
+    without its stock being counted or sold twice.
+    """
+    def __init__(self, name: str, distance: float = 0):
+        """
+        Initialize a new warehouse.
+        name (str): The unique name of the warehouse.
+        distance (float): The shipping distance, used for nearest-first routing.
+        """
+        if not name or distance < 0:
+            raise ValueError("Invalid parameters for creating a Warehouse.")
+        self.name = name
+        self.distance = distance
+        self._stock: Dict[str, int] = {}
+        # Weak references, so inventories from merged stores can be freed.
+        self._inventories: List[ref] = []
+
+    def get_quantity(self, sku: str) -> int:
+        """Get the stock of a SKU in this warehouse."""
+        return self._stock.get(sku, 0)
+
+    def _set_quantity(self, sku: str, quantity: int):
+        """Set the stock of a SKU and notify the inventories holding this warehouse."""
+        old = self._stock.get(sku, 0)
+        if quantity == old:
+            return
+        self._stock[sku] = quantity
+        for inventory_ref in self._inventories:
+            inventory = inventory_ref()
+            if inventory is not None:
+                inventory._stock_changed(sku, self, old, quantity)
+
+    def _attach(self, inventory: "Inventory"):
+        """Start notifying an inventory of stock changes."""
+        self._inventories = [r for r in self._inventories if r() is not None]
+        self._inventories.append(ref(inventory))
+
+    def __str__(self) -> str:
+        """Return a string representation of the warehouse."""
+        return f"{self.name} (Distance: {self.distance})"
+
+
+class Inventory:
+    """
+    A multi-location inventory holding per-warehouse quantities for each SKU.
+
+    The product name is used as SKU. Every tracked product's quantity is kept
+    equal to its stock summed over this inventory's warehouses, so a Product
+    object still represents one SKU no matter how many locations stock it.
+    A product should be tracked by one inventory only, and its stock changed
+    only through the inventory: setting its quantity or calling buy() directly
+    is overwritten by the next change in its warehouses.
+    """
+    def __init__(self, warehouses: Optional[List[Warehouse]] = None):
+        """
+        Initialize a new inventory.
+        warehouses (List[Warehouse]): The stocking locations.
+        """
+        self._warehouses: Dict[str, Warehouse] = {}
+        self._by_distance: List[Warehouse] = []
+        self._products: Dict[str, Product] = {}
+        self._totals: Dict[str, int] = {}
+        # Per-SKU availability index: (distance, name) of warehouses holding stock, nearest first.
+        self._availability: Dict[str, List[Tuple[float, str]]] = {}
+        # SKUs whose product sync is deferred to the end of a batch, or None outside a batch.
+        self._pending: Optional[set] = None
+        for warehouse in warehouses or []:
+            self.add_warehouse(warehouse)
+
+    @property
+    def warehouses(self) -> List[Warehouse]:
+        """Get the warehouses, nearest first."""
+        return list(self._by_distance)
+
+    def add_warehouse(self, warehouse: Warehouse):
+        """
+        Add a stocking location to the inventory.
+        warehouse (Warehouse): The warehouse to add.
+        """
+        if warehouse.name in self._warehouses:
+            raise ValueError(f"Warehouse {warehouse.name} already exists.")
+        self._warehouses[warehouse.name] = warehouse
+        insort(self._by_distance, warehouse, key=lambda w: w.distance)
+        warehouse._attach(self)
+        for sku in self._products:
+            self._stock_changed(sku, warehouse, 0, warehouse.get_quantity(sku))
+
+    def set_quantity(self, product: Product, warehouse_name: str, quantity: int):
+        """
+        Set the stock of a product in one warehouse.
+        product (Product): The product to stock.
+        warehouse_name (str): The name of the warehouse.
+        quantity (int): The quantity available in that warehouse.
+        """
+        if warehouse_name not in self._warehouses:
+            raise ValueError(f"Unknown warehouse {warehouse_name}.")
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative.")
+        tracked = self._products.get(product.name)
+        if tracked is None:
+            self._track(product)
+        elif tracked is not product:
+            raise ValueError(f"Another product is already tracked as {product.name}.")
+        self._warehouses[warehouse_name]._set_quantity(product.name, quantity)
+
+    def adjust_quantities(self, deltas: Dict[str, int], warehouse_name: str):
+        """
+        Apply quantity deltas for tracked SKUs to one warehouse as a single batch.
+        Every delta is validated before any stock changes.
+        deltas (Dict[str, int]): The change in stock per SKU.
+        warehouse_name (str): The name of the warehouse.
+        """
+        warehouse = self._warehouses.get(warehouse_name)
+        if warehouse is None:
+            raise ValueError(f"Unknown warehouse {warehouse_name}.")
+        for sku, delta in deltas.items():
+            if sku not in self._products:
+                raise ValueError(f"Product {sku} is not tracked by the inventory.")
+            if warehouse.get_quantity(sku) + delta < 0:
+                raise ValueError(f"Quantity of {sku} in warehouse {warehouse_name} cannot be negative.")
+
+        self._pending = set()
+        try:
+            for sku, delta in deltas.items():
+                warehouse._set_quantity(sku, warehouse.get_quantity(sku) + delta)
+        finally:
+            self._sync_pending()
+
+    def get_quantity(self, sku: str, warehouse_name: Optional[str] = None) -> int:
+        """
+        Get the stock of a SKU, in one warehouse or across all of them.
+        sku (str): The product name.
+        warehouse_name (str): The warehouse to look at, or None for all.
+        """
+        if warehouse_name is None:
+            return self._totals.get(sku, 0)
+        warehouse = self._warehouses.get(warehouse_name)
+        return 0 if warehouse is None else warehouse.get_quantity(sku)
+
+    def get_total_quantity(self) -> int:
+        """Get the total quantity of all SKUs across all warehouses."""
+        return sum(self._totals.values())
+
+    def get_product(self, sku: str) -> Optional[Product]:
+        """Get the product tracked for a SKU, or None."""
+        return self._products.get(sku)
+
+    def __contains__(self, sku):
+        """Check if a SKU is tracked by the inventory."""
+        return sku in self._products
+
+    def _track(self, product: Product):
+        """Start tracking a product, indexing any stock its warehouses already hold."""
+        sku = product.name
+        self._products[sku] = product
+        self._totals[sku] = 0
+        self._availability[sku] = []
+        for warehouse in self._warehouses.values():
+            self._stock_changed(sku, warehouse, 0, warehouse.get_quantity(sku))
+        product.quantity = self._totals[sku]
+
+    def _sync_pending(self):
+        """End a batch, setting each changed product's quantity once."""
+        pending, self._pending = self._pending, None
+        for sku in pending:
+            self._products[sku].quantity = self._totals[sku]
+
+    def _stock_changed(self, sku: str, warehouse: Warehouse, old: int, new: int):
+        """
+        Update the total and availability index of one SKU in place, and sync its
+        product, or defer the sync while a batch is running.
+        """
+        product = self._products.get(sku)
+        if product is None or old == new:
+            return
+        self._totals[sku] += new - old
+        if old == 0:
+            insort(self._availability[sku], (warehouse.distance, warehouse.name))
+        elif new == 0:
+            self._availability[sku].remove((warehouse.distance, warehouse.name))
+        if self._pending is None:
+            product.quantity = self._totals[sku]
+        else:
+            self._pending.add(sku)
+
+    def route(self, shopping_list: List[Tuple[Product, int]],
+              strategy: str = FEWEST_SHIPMENTS) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Split cart lines across warehouses without changing any stock.
+        shopping_list (List[Tuple[Product, int]]): The cart lines to route.
+        strategy (str): FEWEST_SHIPMENTS or NEAREST_FIRST.
+        return: A mapping of warehouse name to the (sku, quantity) picks shipped from it.
+        Raises:
+            ValueError: If a quantity is not positive, a SKU is untracked or not enough stock is available.
+        """
+        if strategy not in (FEWEST_SHIPMENTS, NEAREST_FIRST):
+            raise ValueError(f"Unknown routing strategy {strategy}.")
+        if not shopping_list:
+            return {}
+
+        remaining: Dict[str, int] = {}
+        for product, quantity in shopping_list:
+            sku = product.name
+            if quantity <= 0:
+                raise ValueError(f"Quantity of {sku} must be at least 1.")
+            if sku not in self._products:
+                raise ValueError(f"Product {sku} is not tracked by the inventory.")
+            remaining[sku] = remaining.get(sku, 0) + quantity
+        for sku, quantity in remaining.items():
+            if quantity > self._totals[sku]:
+                raise ValueError(f"Not enough quantity available for {sku}. "
+                                 f"Available: {self._totals[sku]}, Requested: {quantity}")
+
+        shipments: Dict[str, List[Tuple[str, int]]] = {}
+        if strategy == FEWEST_SHIPMENTS:
+            self._route_whole_lines(remaining, shipments)
+        for sku, quantity in remaining.items():
+            for _, name in self._availability[sku]:
+                pick = min(quantity, self._warehouses[name]._stock[sku])
+                shipments.setdefault(name, []).append((sku, pick))
+                quantity -= pick
+                if quantity == 0:
+                    break
+        return shipments
+
+    def _route_whole_lines(self, remaining: Dict[str, int], shipments: Dict[str, List[Tuple[str, int]]]):
+        """
+        Greedily assign whole lines to the warehouse that can ship the most of them,
+        preferring the nearest on ties. Lines no single warehouse can cover are left in remaining.
+        """
+        # Most carts fit in one warehouse. Only warehouses stocking the first line can
+        # ship all of them, and the index lists those nearest first.
+        first_sku = next(iter(remaining))
+        for _, name in self._availability[first_sku]:
+            stock = self._warehouses[name]._stock
+            if all(stock.get(sku, 0) >= quantity for sku, quantity in remaining.items()):
+                shipments[name] = list(remaining.items())
+                remaining.clear()
+                return
+
+        fits: Dict[str, List[str]] = {}
+        counts: Dict[str, int] = {}
+        for sku, quantity in remaining.items():
+            fits[sku] = [name for _, name in self._availability[sku]
+                         if self._warehouses[name]._stock[sku] >= quantity]
+            for name in fits[sku]:
+                counts[name] = counts.get(name, 0) + 1
+
+        while counts:
+            name = max(counts, key=lambda n: (counts[n], -self._warehouses[n].distance))
+            skus = [sku for sku in remaining if name in fits[sku]]
+            shipments[name] = [(sku, remaining.pop(sku)) for sku in skus]
+            for sku in skus:
+                for other in fits[sku]:
+                    counts[other] -= 1
+                    if counts[other] == 0:
+                        del counts[other]
+
+    def fulfill(self, shipments: Dict[str, List[Tuple[str, int]]]):
+        """
+        Deduct routed picks from the warehouses.
+        Each product's quantity is updated once, after all picks are deducted.
+        shipments (Dict[str, List[Tuple[str, int]]]): The result of route().
+        """
+        for name, picks in shipments.items():
+            warehouse = self._warehouses.get(name)
+            if warehouse is None:
+                raise ValueError(f"Unknown warehouse {name}.")
+            stock = warehouse._stock
+            for sku, quantity in picks:
+                if quantity <= 0:
+                    raise ValueError(f"Quantity of {sku} must be at least 1.")
+                if quantity > stock.get(sku, 0):
+                    raise ValueError(f"Not enough quantity of {sku} in warehouse {name}.")
+
+        self._pending = set()
+        try:
+            for name, picks in shipments.items():
+                warehouse = self._warehouses[name]
+                stock = warehouse._stock
+                for sku, quantity in picks:
+                    warehouse._set_quantity(sku, stock[sku] - quantity)
+        finally:
+            self._sync_pending()
+
+    def merge(self, other: "Inventory") -> "Inventory":
+        """
+        Combine two inventories into a new one that shares their warehouses.
+        Stock is not copied, so selling through the merged inventory also reduces
+        what the operands can sell. Every SKU gets a new Product object, so the
+        operands' products keep reporting their own totals.
+        other (Inventory): Another Inventory object.
+        return:
+            Inventory: A new Inventory over the warehouses of both.
+        Raises:
+            ValueError: If the two inventories hold different warehouses with the same name.
+        """
+        merged = Inventory()
+        for source in (self, other):
+            for name, warehouse in source._warehouses.items():
+                existing = merged._warehouses.get(name)
+                if existing is None:
+                    merged.add_warehouse(warehouse)
+                elif existing is not warehouse:
+                    raise ValueError(f"Both inventories have a different warehouse named {name}.")
+        for source in (self, other):
+            for sku, product in source._products.items():
+                if sku not in merged._products:
+                    merged._track(copy(product))
+        return merged
@@ -221,9 +221,9 @@ def main():
     ]
 
     # Adding promotions
-    discount_promotion = promo.PercentageDiscount("20% off", 20)
-    second_item_half_price = promo.SecondItemHalfPrice("Second item at half price")
-    buy_two_get_one_free = promo.BuyTwoGetOneFree("Buy 2, get 1 free")
+    discount_promotion = promo.intern_promotion(promo.PercentageDiscount, "20% off", 20)
+    second_item_half_price = promo.intern_promotion(promo.SecondItemHalfPrice, "Second item at half price")
+    buy_two_get_one_free = promo.intern_promotion(promo.BuyTwoGetOneFree, "Buy 2, get 1 free")
 
     product_list[0].promotion = discount_promotion  # MacBook Air M2
     product_list[1].promotion = second_item_half_price  # Bose QuietComfort Earbuds
@@ -0,0 +1,91 @@
+"""Report the measured memory cost of product objects.
+
+Run with: python memory_report.py [count]
+"""
+import sys
+import tracemalloc
+
+import products as prod
+import promotions as promo
+
+class _DictProduct:
+    """A product as it was stored before __slots__: the same fields, in an instance dict."""
+    def __init__(self, name, price, quantity):
+        self._name = name
+        self._price = price
+        self._quantity = quantity
+        self._active = True
+        self._promotion = None
+
+
+class _DictLimitedProduct(_DictProduct):
+    """A limited product as it was stored before __slots__."""
+    def __init__(self, name, price, quantity, maximum):
+        super().__init__(name, price, quantity)
+        self.maximum = maximum
+
+
+class _DictPercentageDiscount:
+    """A percentage discount as it was stored before __slots__."""
+    def __init__(self, name, discount_percent):
+        self.name = name
+        self.discount_percent = discount_percent
+
+
+def measure(factory, count: int) -> float:
+    """
+    Measure the average number of bytes allocated per object.
+    factory (Callable): Creates one object from its index.
+    count (int): How many objects to create.
+    return: The traced bytes per object.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the objects is not part of their cost.
+    return (after - before - sys.getsizeof(objects)) / len(objects)
+
+
+def memory_report(count: int = 100000) -> str:
+    """
+    Generate a per-object memory report for products and promotions.
+    count (int): How many objects to create per measurement.
+    return: The formatted report.
+    """
+    def promoted_product(i):
+        product = prod.Product("MacBook Air M2", price=1450, quantity=i)
+        product.promotion = promo.intern_promotion(promo.PercentageDiscount, "20% off", 20)
+        return product
+
+    # Each row is measured against an unslotted class with the original fields.
+    # Product has since gained three fields for snapshots and restocking, which
+    # only the slotted side carries.
+    rows = [
+        ("Product",
+         lambda i: prod.Product("MacBook Air M2", price=1450, quantity=i),
+         lambda i: _DictProduct("MacBook Air M2", price=1450, quantity=i)),
+        ("NonStockedProduct",
+         lambda i: prod.NonStockedProduct("Windows License", price=125),
+         lambda i: _DictProduct("Windows License", price=125, quantity=0)),
+        ("LimitedProduct",
+         lambda i: prod.LimitedProduct("Shipping", price=10, quantity=i, maximum=1),
+         lambda i: _DictLimitedProduct("Shipping", price=10, quantity=i, maximum=1)),
+        ("PercentageDiscount",
+         lambda i: promo.PercentageDiscount("20% off", 20),
+         lambda i: _DictPercentageDiscount("20% off", 20)),
+    ]
+    lines = [f"Bytes per object, averaged over {count} objects:"]
+    for label, factory, baseline_factory in rows:
+        size = measure(factory, count)
+        baseline = measure(baseline_factory, count)
+        lines.append(f"{label}: {size:.1f} (without __slots__ {baseline:.1f}, {(size - baseline) / baseline:+.1%})")
+    lines.append(f"Product with shared promotion: {measure(promoted_product, count):.1f}")
+    shared = len({id(promoted_product(i).promotion) for i in range(count)})
+    lines.append(f"Distinct '20% off' promotions across {count} products: {shared}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(memory_report(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
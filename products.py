@@ -1,6 +1,42 @@
+from threading import Lock
+from weakref import WeakSet
+
+
+class VersionClock:
+    """
+    The epoch shared by all products and snapshots.
+    Every snapshot reads at the current epoch and then advances it, so any later
+    write to a product happens at a newer epoch than the snapshot.
+
+    Snapshot registration and the field writes of one product update hold the
+    lock, so a snapshot never falls between the fields of one update, such as a
+    purchase emptying the stock and deactivating the product. The lock is held
+    only for those writes, never while pricing or validating, and snapshot reads
+    take no lock.
+    """
+    epoch = 0
+    snapshots = WeakSet()
+    lock = Lock()
+
+    @classmethod
+    def register(cls, snapshot):
+        """Register an open snapshot, setting the version it reads at."""
+        with cls.lock:
+            snapshot.version = cls.epoch
+            cls.epoch += 1
+            cls.snapshots.add(snapshot)
+
+    @classmethod
+    def open_versions(cls):
+        """Get the versions of all snapshots that are still open."""
+        return [snapshot.version for snapshot in cls.snapshots]
+
+
 # Product class and its derived classes
 class Product:
     """A class representing a generic product."""
+    __slots__ = ("_name", "_price", "_quantity", "_active", "_stocked_out", "_promotion", "_written", "_history")
+
     def __init__(self, name, price, quantity):
         """
         Initialize a new product.
@@ -15,7 +51,10 @@ class Product:
         self._price = price
         self._quantity = quantity
         self._active = True
+        self._stocked_out = False
         self._promotion = None
+        self._written = VersionClock.epoch
+        self._history = None
 
     @property
     def name(self):
@@ -27,6 +66,15 @@ class Product:
         """Get the product's price."""
         return self._price
 
+    @price.setter
+    def price(self, value):
+        """Set the product's price."""
+        if value < 0:
+            raise ValueError("Price cannot be negative.")
+        with VersionClock.lock:
+            self._preserve()
+            self._price = value
+
     @property
     def quantity(self):
         """Get the product's quantity in stock."""
@@ -34,12 +82,27 @@ class Product:
 
     @quantity.setter
     def quantity(self, value):
-        """Set the product's quantity in stock."""
+        """
+        Set the product's quantity in stock.
+        Running out of stock deactivates the product, and restocking reactivates it.
+        """
         if value < 0:
             raise ValueError("Quantity cannot be negative.")
+        with VersionClock.lock:
+            self._write_quantity(value)
+
+    def _write_quantity(self, value):
+        """Write the quantity and the active state it implies. Called with VersionClock.lock held."""
+        if self._written != VersionClock.epoch:
+            self._preserve()
         self._quantity = value
-        if self._quantity == 0:
-            self.deactivate()
+        if value == 0:
+            if self._active:
+                self._active = False
+                self._stocked_out = True
+        elif self._stocked_out:
+            self._active = True
+            self._stocked_out = False
 
     @property
     def active(self):
@@ -54,7 +117,9 @@ class Product:
     @promotion.setter
     def promotion(self, promo):
         """Set a promotion for the product."""
-        self._promotion = promo
+        with VersionClock.lock:
+            self._preserve()
+            self._promotion = promo
 
     def is_active(self) -> bool:
         """Determine if the product is active."""
@@ -62,16 +127,90 @@ class Product:
 
     def activate(self):
         """Activate the product."""
-        self._active = True
+        with VersionClock.lock:
+            self._preserve()
+            self._active = True
+            self._stocked_out = False
 
     def deactivate(self):
         """Deactivate the product."""
-        self._active = False
+        with VersionClock.lock:
+            self._preserve()
+            self._active = False
+            self._stocked_out = False
+
+    def _preserve(self):
+        """
+        Keep the current state for open snapshots before it is overwritten.
+        Only the first write per epoch copies anything, and only while a snapshot
+        may still need the state; history no open snapshot can see is dropped.
+        Called with VersionClock.lock held, before any field changes.
+        """
+        epoch = VersionClock.epoch
+        if self._written == epoch:
+            return
+        versions = VersionClock.open_versions()
+        if not versions:
+            self._history = None
+        else:
+            history = self._history or []
+            if max(versions) >= self._written:
+                history.append((self._written, self._price, self.quantity, self._active, self._promotion))
+            oldest = min(versions)
+            while history and (history[1][0] if len(history) > 1 else epoch) <= oldest:
+                del history[0]
+            self._history = history or None
+        self._written = epoch
+
+    def state_at(self, version):
+        """
+        Get the (price, quantity, active, promotion) state as seen by a snapshot.
+        version (int): The version the snapshot reads at.
+        """
+        # Read the fields before the epoch: a write newer than the snapshot moves
+        # _written past version before it changes any field.
+        state = self._price, self.quantity, self._active, self._promotion
+        if self._written <= version:
+            return state
+        for written, *state in reversed(tuple(self._history or ())):
+            if written <= version:
+                return tuple(state)
+        raise ValueError(f"Product {self.name} did not exist at version {version}.")
 
     def __str__(self) -> str:
         """Return a string representation of the product."""
-        promo_info = f" | Promotion: {self.promotion.name}" if self.promotion else ""
-        return f"{self.name}, Price: {self.price}, Quantity: {self.quantity}{promo_info}"
+        return self.format_state(self._price, self._quantity, self._promotion)
+
+    def format_state(self, price, quantity, promotion) -> str:
+        """Format the product with the given price, quantity and promotion."""
+        promo_info = f" | Promotion: {promotion.name}" if promotion else ""
+        return f"{self._name}, Price: {price}, Quantity: {quantity}{promo_info}"
+
+    def __copy__(self):
+        """Return an independent copy of the product's current state, without snapshot history."""
+        clone = object.__new__(type(self))
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(self, slot):
+                    setattr(clone, slot, getattr(self, slot))
+        clone._written = VersionClock.epoch
+        clone._history = None
+        return clone
+
+    def check_purchase(self, quantity):
+        """
+        Check that a quantity of the product can be bought, without buying it.
+        Raises:
+            ValueError: If the quantity is not positive.
+            Exception: If the product is inactive or not enough is in stock.
+        """
+        if quantity <= 0:
+            raise ValueError("You should choose at least 1 item.")
+        if not self._active:
+            raise Exception(f"Product {self._name} is not active.")
+        if quantity > self._quantity:
+            raise Exception(f"Not enough quantity available for {self._name}. Available: {self._quantity}, /"
+                            f"Requested: {quantity}")
 
     def buy(self, quantity) -> float:
         """ Purchase a specified quantity of the product.
@@ -81,18 +220,24 @@ class Product:
 
         if quantity <= 0:
             raise ValueError("You should choose at least 1 item.")
-        if not self.active:
-            raise Exception(f"Product {self.name} is not active.")
-        if quantity > self.quantity:
-            raise Exception(f"Not enough quantity available for {self.name}. Available: {self.quantity}, /"
-                            f"Requested: {quantity}")
-        if self.promotion:
-            total_price = self.promotion.apply_promotion(self, quantity)
-        else:
-            total_price = self.price * quantity
-        self.quantity -= quantity
+        total_price = self.price_for(quantity)
+        with VersionClock.lock:
+            # Check under the lock, so concurrent buyers cannot oversell.
+            if not self._active:
+                raise Exception(f"Product {self._name} is not active.")
+            if quantity > self._quantity:
+                raise Exception(f"Not enough quantity available for {self._name}. Available: {self._quantity}, /"
+                                f"Requested: {quantity}")
+            self._write_quantity(self._quantity - quantity)
         return total_price
 
+    def price_for(self, quantity) -> float:
+        """Get the price of a quantity of the product with its promotion, without buying it."""
+        promotion = self._promotion
+        if promotion:
+            return promotion.apply_promotion(self, quantity)
+        return self._price * quantity
+
     def __lt__(self, other):
         """Less than comparison based on price."""
         return self.price < other.price
@@ -104,6 +249,8 @@ class Product:
 
 class NonStockedProduct(Product):
     """A class representing a product that is not physically stocked."""
+    __slots__ = ()
+
     def __init__(self, name, price):
         """Initialize a non-stocked product.
         name (str): The name of the product.
@@ -122,9 +269,16 @@ class NonStockedProduct(Product):
         """Prevent setting quantity for non-stocked products."""
         pass
 
-    def __str__(self) -> str:
-        """Return a string representation of the product."""
-        return f"{self.name}, Price: {self.price} (Non-stocked item)"
+    def format_state(self, price, quantity, promotion) -> str:
+        """Format the product with the given price; non-stocked products show no quantity."""
+        return f"{self._name}, Price: {price} (Non-stocked item)"
+
+    def check_purchase(self, quantity):
+        """Check that a quantity can be bought; non-stocked products never run out."""
+        if quantity <= 0:
+            raise ValueError("You should choose at least 1 item.")
+        if not self.is_active():
+            raise Exception(f"Product {self.name} is not active.")
 
     def buy(self, quantity) -> float:
         """Purchase a specified quantity of the product.
@@ -132,15 +286,14 @@ class NonStockedProduct(Product):
         return: The total price for the purchased quantity.
         """
 
-        if quantity <= 0:
-            raise ValueError("You should choose at least 1 item.")
-        if not self.is_active():
-            raise Exception(f"Product {self.name} is not active.")
+        self.check_purchase(quantity)
         return self.price * quantity
 
 
 class LimitedProduct(Product):
     """A class representing a product with purchase limitations. """
+    __slots__ = ("maximum",)
+
     def __init__(self, name, price, quantity, maximum):
         """
         Initialize a limited product.
@@ -153,18 +306,18 @@ class LimitedProduct(Product):
         super().__init__(name, price, quantity)
         self.maximum = maximum
 
-    def __str__(self) -> str:
-        """Return a string representation of the product."""
+    def format_state(self, price, quantity, promotion) -> str:
+        """Format the product with the given price and quantity, and its per-order maximum."""
+        return f"{self._name}, Price: {price}, Quantity: {quantity} (Max per order: {self.maximum})"
 
-        return f"{self.name}, Price: {self.price}, Quantity: {self.quantity} (Max per order: {self.maximum})"
+    def check_purchase(self, quantity):
+        """Check that a quantity can be bought, including the per-order maximum."""
+        if quantity > self.maximum:
+            raise Exception(f"Cannot buy more than {self.maximum} of {self.name} in one order.")
+        super().check_purchase(quantity)
 
     def buy(self, quantity) -> float:
-        """
-        Purchase a specified quantity of the product.
-        quantity: The number to buy.
-        return: The total price for the purchased quantity (float).
-        """
-
+        """Purchase a specified quantity of the product, up to the per-order maximum."""
         if quantity > self.maximum:
             raise Exception(f"Cannot buy more than {self.maximum} of {self.name} in one order.")
         return super().buy(quantity)
@@ -2,14 +2,25 @@ from abc import ABC, abstractmethod
 
 
 class Promotion(ABC):
-    """Abstract base class for all promotions."""
+    """
+    Abstract base class for all promotions.
+    Promotions hold no per-product state and are read-only once created, so
+    equal promotions can be shared through intern_promotion.
+    """
+    __slots__ = ("_name",)
+
     def __init__(self, name: str):
         """
         Initialize a promotion.
         name (str): The name of the promotion.
         """
 
-        self.name = name
+        self._name = name
+
+    @property
+    def name(self):
+        """Get the promotion's name."""
+        return self._name
 
     @abstractmethod
     def apply_promotion(self, product, quantity) -> float:
@@ -24,6 +35,8 @@ class Promotion(ABC):
 
 class PercentageDiscount(Promotion):
     """A promotion offering a percentage discount."""
+    __slots__ = ("_discount_percent",)
+
     def __init__(self, name: str, discount_percent: float):
         """
         Initialize a percentage discount promotion.
@@ -31,7 +44,12 @@ class PercentageDiscount(Promotion):
         discount_percent (float): The discount percentage.
         """
         super().__init__(name)
-        self.discount_percent = discount_percent
+        self._discount_percent = discount_percent
+
+    @property
+    def discount_percent(self):
+        """Get the discount percentage."""
+        return self._discount_percent
 
     def apply_promotion(self, product, quantity) -> float:
         """
@@ -40,12 +58,14 @@ class PercentageDiscount(Promotion):
         quantity (int): The quantity of the product.
         return: The total price after applying the discount.
         """
-        discount = (self.discount_percent / 100) * product.price
+        discount = (self._discount_percent / 100) * product.price
         return product.price * quantity - discount * quantity
 
 
 class SecondItemHalfPrice(Promotion):
     """A promotion offering the second item at half price."""
+    __slots__ = ()
+
     def apply_promotion(self, product, quantity) -> float:
         """
         Apply the second item half price promotion.
@@ -61,6 +81,8 @@ class SecondItemHalfPrice(Promotion):
 
 class BuyTwoGetOneFree(Promotion):
     """A promotion offering a free item for every two items purchased."""
+    __slots__ = ()
+
     def apply_promotion(self, product, quantity) -> float:
         """Apply the buy two get one free promotion.
         product (Product): The product to which the promotion is applied.
@@ -70,3 +92,20 @@ class BuyTwoGetOneFree(Promotion):
         remainder = quantity % 3
         total_price = (sets_of_three * 2 + remainder) * product.price
         return total_price
+
+
+_interned_promotions = {}
+
+
+def intern_promotion(promotion_class, *args) -> Promotion:
+    """
+    Get the shared instance of a promotion, creating it on first use.
+    promotion_class (type): The Promotion subclass.
+    args: The arguments the promotion is created with.
+    return: The same promotion object for every call with equal arguments.
+    """
+    key = (promotion_class, args)
+    promotion = _interned_promotions.get(key)
+    if promotion is None:
+        promotion = _interned_promotions[key] = promotion_class(*args)
+    return promotion
@@ -0,0 +1,86 @@
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from products import Product, VersionClock
+from promotions import Promotion
+
+
+class ProductRecord(NamedTuple):
+    """An immutable, point-in-time view of a product."""
+    product: Product
+    name: str
+    price: float
+    quantity: int
+    active: bool
+    promotion: Optional[Promotion]
+
+    def is_active(self) -> bool:
+        """Determine if the product was active."""
+        return self.active
+
+    def __str__(self) -> str:
+        """Return a string representation of the record, formatted like its product."""
+        return self.product.format_state(self.price, self.quantity, self.promotion)
+
+
+class Snapshot:
+    """
+    A cheap, read-only view of a store at one point in time.
+
+    Taking a snapshot copies only the references in the store's product list,
+    never the products; products keep their previous state only when they are
+    written while the snapshot is open.
+    """
+    def __init__(self, products: Iterable[Product]):
+        """
+        Initialize a snapshot over the store's current products.
+        products (Iterable[Product]): The products in the store.
+        """
+        self._products = tuple(products)
+        self._product_ids = None
+        VersionClock.register(self)
+
+    def get_record(self, product: Product) -> ProductRecord:
+        """Get the state of a product as of this snapshot."""
+        price, quantity, active, promotion = product.state_at(self.version)
+        return ProductRecord(product, product.name, price, quantity, active, promotion)
+
+    def _check_in_snapshot(self, shopping_list: List[Tuple[Product, int]]):
+        """Raise ValueError for a product that was not in the store when the snapshot was taken."""
+        if self._product_ids is None:
+            self._product_ids = {id(product) for product in self._products}
+        for product, _ in shopping_list:
+            if id(product) not in self._product_ids:
+                raise ValueError(f"Product {product.name} is not in the snapshot.")
+
+    def get_all_products(self) -> List[ProductRecord]:
+        """Get a list of all products that were active."""
+        records = (self.get_record(product) for product in self._products)
+        return [record for record in records if record.active]
+
+    def get_total_quantity(self) -> int:
+        """Get the total quantity of all products in the snapshot."""
+        return sum(product.state_at(self.version)[1] for product in self._products)
+
+    def calculate_original_price(self, shopping_list: List[Tuple[Product, int]]) -> float:
+        """Calculate the total price before promotions, at the prices of the snapshot."""
+        self._check_in_snapshot(shopping_list)
+        return sum(product.state_at(self.version)[0] * quantity for product, quantity in shopping_list)
+
+    def calculate_discounted_price(self, shopping_list: List[Tuple[Product, int]]) -> float:
+        """Calculate the total price after the promotions in effect, without buying anything."""
+        self._check_in_snapshot(shopping_list)
+        total_price = 0.0
+        for product, quantity in shopping_list:
+            record = self.get_record(product)
+            if record.promotion:
+                total_price += record.promotion.apply_promotion(record, quantity)
+            else:
+                total_price += record.price * quantity
+        return total_price
+
+    def __contains__(self, product_name):
+        """Check if a product was in the store by its name."""
+        return any(product.name == product_name for product in self._products)
+
+    def __len__(self):
+        """Return the number of products in the snapshot."""
+        return len(self._products)
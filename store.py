@@ -1,15 +1,26 @@
-from typing import List, Tuple
-from products import Product, LimitedProduct
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+from products import Product, LimitedProduct, NonStockedProduct
+from inventory import Inventory, FEWEST_SHIPMENTS
+from snapshot import Snapshot
+from idempotency import IdempotencyCache
 
 
 class Store:
     """A class representing a store containing products."""
-    def __init__(self, products: List[Product]):
+    def __init__(self, products: List[Product], inventory: Optional[Inventory] = None,
+                 routing_strategy: str = FEWEST_SHIPMENTS,
+                 order_results: Optional[IdempotencyCache] = None):
         """
         Initialize a new store with a list of products.
         products (List[Product]): A list of Product objects in the store.
+        inventory (Inventory): Optional multi-warehouse stock for some of the products.
+        routing_strategy (str): How orders are split across warehouses.
+        order_results (IdempotencyCache): Results of recent orders by idempotency key.
         """
         self.products = products
+        self.inventory = inventory
+        self.routing_strategy = routing_strategy
+        self.order_results = order_results if order_results is not None else IdempotencyCache()
 
     def add_product(self, product: Product):
         """
@@ -26,10 +37,89 @@ class Store:
         """
         self.products = [p for p in self.products if p != product]
 
+    def bulk_update(self, quantity_deltas: Union[Mapping[str, int], Iterable[Tuple[str, int]]] = (),
+                    prices: Union[Mapping[str, float], Iterable[Tuple[str, float]]] = (),
+                    warehouse_name: Optional[str] = None) -> int:
+        """
+        Restock and reprice many products in one batch.
+        Deltas for the same product are summed and the last price given wins. The
+        whole batch is validated before anything changes, products deactivated by
+        running out of stock are reactivated when restocked, and the inventory
+        index is rebuilt once per product.
+        quantity_deltas: A mapping or iterable of (product name, change in stock).
+        prices: A mapping or iterable of (product name, new price).
+        warehouse_name (str): The warehouse receiving stock of inventory-tracked products.
+        return: The number of products changed.
+        Raises:
+            ValueError: If a product is unknown, ambiguous or not stocked, or a quantity
+                or price would be negative.
+        """
+        deltas = self._merge_updates(quantity_deltas, sum_duplicates=True)
+        new_prices = self._merge_updates(prices, sum_duplicates=False)
+
+        by_name = {}
+        ambiguous = set()
+        for product in self.products:
+            if by_name.setdefault(product.name, product) is not product:
+                ambiguous.add(product.name)
+        for name in deltas.keys() | new_prices.keys():
+            if name not in by_name:
+                raise ValueError(f"Product {name} is not in the store.")
+            if name in ambiguous:
+                raise ValueError(f"More than one product in the store is named {name}.")
+
+        warehouse_deltas = {}
+        for name, delta in deltas.items():
+            if isinstance(by_name[name], NonStockedProduct):
+                raise ValueError(f"Product {name} is not stocked, so its quantity cannot change.")
+            if self.inventory is not None and name in self.inventory:
+                if warehouse_name is None:
+                    raise ValueError(f"Product {name} is stocked in warehouses; a warehouse_name is required.")
+                warehouse_deltas[name] = delta
+            elif by_name[name].quantity + delta < 0:
+                raise ValueError(f"Quantity of {name} cannot be negative.")
+        for name, price in new_prices.items():
+            if price < 0:
+                raise ValueError(f"Price of {name} cannot be negative.")
+
+        if warehouse_deltas:
+            self.inventory.adjust_quantities(warehouse_deltas, warehouse_name)
+        for name, delta in deltas.items():
+            if name not in warehouse_deltas:
+                by_name[name].quantity += delta
+        for name, price in new_prices.items():
+            by_name[name].price = price
+        return len(deltas.keys() | new_prices.keys())
+
+    @staticmethod
+    def _merge_updates(updates, sum_duplicates: bool) -> Dict[str, float]:
+        """Collapse a mapping or iterable of (product name, value) pairs into one value per product."""
+        if isinstance(updates, Mapping):
+            return dict(updates)
+        merged = {}
+        for name, value in updates:
+            if sum_duplicates:
+                merged[name] = merged.get(name, 0) + value
+            else:
+                merged[name] = value
+        return merged
+
     def get_total_quantity(self) -> int:
-        """Get the total quantity of all products in the store."""
+        """Get the total quantity of all products in the store, across all warehouses."""
 
-        return sum(product.quantity for product in self.products)
+        if self.inventory is None:
+            return sum(product.quantity for product in self.products)
+        inventory = self.inventory
+        return sum(inventory.get_quantity(product.name) if product.name in inventory else product.quantity
+                   for product in self.products)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Take a consistent, read-only view of the store at this point in time.
+        The snapshot keeps its own tuple of product references, so later changes
+        to the catalog do not show in it.
+        """
+        return Snapshot(self.products)
 
     def get_all_products(self) -> List[Product]:
         """Get a list of all active products in the store."""
@@ -48,19 +138,59 @@ class Store:
             total_price += product.buy(quantity)
         return total_price
 
-    def order(self, shopping_list: List[Tuple[Product, int]]) -> str:
+    def order(self, shopping_list: List[Tuple[Product, int]], idempotency_key: Optional[Hashable] = None) -> str:
         """
         Process an order for multiple products, checking for constraints.
+        A retry with the idempotency_key of a recent successful order returns the
+        original result without repricing or touching stock.
         Raises:
-            ValueError: If the quantity ordered exceeds the limit for LimitedProduct.
+            ValueError: If the quantity ordered exceeds the limit for LimitedProduct,
+                or the idempotency_key was used for a different shopping list.
+            RuntimeError: If the order with this idempotency_key is still being processed.
+        """
+        if idempotency_key is None:
+            return self._place_order(shopping_list)
+
+        fingerprint = tuple((product.name, quantity) for product, quantity in shopping_list)
+        result = self.order_results.reserve(idempotency_key, fingerprint)
+        if result is not None:
+            return result
+        try:
+            result = self._place_order(shopping_list)
+        except Exception:
+            self.order_results.release(idempotency_key)
+            raise
+        self.order_results.complete(idempotency_key, result)
+        return result
+
+    def _place_order(self, shopping_list: List[Tuple[Product, int]]) -> str:
         """
+        Check, price and deduct an order, returning its summary.
+        Every line is validated and routed before any stock changes. Warehouse-stocked
+        lines are priced without buying and deducted only through the inventory.
+        """
+        if self.inventory is not None:
+            shopping_list = [(self.inventory.get_product(product.name) or product, quantity)
+                             for product, quantity in shopping_list]
 
+        ordered = {}
         for product, quantity in shopping_list:
             if isinstance(product, LimitedProduct) and quantity > product.maximum:
                 raise ValueError(f"Cannot order more than {product.maximum} units of {product.name} in one order.")
+            ordered[product] = ordered.get(product, 0) + quantity
+        for product, quantity in ordered.items():
+            product.check_purchase(quantity)
+        shipments = self.route_order(shopping_list)
 
         original_price = self.calculate_original_price(shopping_list)
-        discounted_price = self.calculate_discounted_price(shopping_list)
+        discounted_price = 0.0
+        for product, quantity in shopping_list:
+            if self.inventory is not None and product.name in self.inventory:
+                discounted_price += product.price_for(quantity)
+            else:
+                discounted_price += product.buy(quantity)
+        if shipments:
+            self.inventory.fulfill(shipments)
         savings = original_price - discounted_price
 
         if savings > 0:
@@ -70,6 +200,16 @@ class Store:
         else:
             return f"Total price: ${discounted_price:.2f}"
 
+    def route_order(self, shopping_list: List[Tuple[Product, int]]):
+        """
+        Split the warehouse-stocked lines of an order across warehouses.
+        return: A mapping of warehouse name to (sku, quantity) picks, empty without an inventory.
+        """
+        if self.inventory is None:
+            return {}
+        tracked = [(product, quantity) for product, quantity in shopping_list if product.name in self.inventory]
+        return self.inventory.route(tracked, self.routing_strategy)
+
     def __contains__(self, product_name):
         """
         Check if a product is available in the store by its name.
@@ -81,9 +221,25 @@ class Store:
     def __add__(self, other):
         """
         Combine the products of two stores into a new store.
+        Warehouse-stocked products of both stores are merged into one SKU that
+        shares their warehouses, so the operands are left untouched and no
+        physical stock is duplicated.
         other (Store): Another Store object.
         return:
             Store: A new Store object with products from both stores.
         """
-        new_products = self.products + other.products
-        return Store(new_products)
+        if self.inventory is None or other.inventory is None:
+            inventory = self.inventory or other.inventory
+        else:
+            inventory = self.inventory.merge(other.inventory)
+
+        new_products = []
+        stocked_names = set()
+        for product in self.products + other.products:
+            if inventory is not None and product.name in inventory:
+                if product.name in stocked_names:
+                    continue
+                stocked_names.add(product.name)
+                product = inventory.get_product(product.name)
+            new_products.append(product)
+        return Store(new_products, inventory, self.routing_strategy)
@@ -1,7 +1,9 @@
 import pytest
 from products import Product, NonStockedProduct, LimitedProduct
 from store import Store
-from promotions import PercentageDiscount, SecondItemHalfPrice, BuyTwoGetOneFree
+from promotions import PercentageDiscount, SecondItemHalfPrice, BuyTwoGetOneFree, intern_promotion
+from inventory import Inventory, Warehouse, NEAREST_FIRST
+from idempotency import IdempotencyCache
 
 
 def test_create_product():
@@ -167,3 +169,307 @@ def test_order_with_limited_products(store_with_products):
     assert float(total_price.split('$')[1]) == 100.0  # Extract numerical value
     with pytest.raises(ValueError):
         store_with_products.order([(limited_product, 3)])  # Should raise an error, limit is 2
+
+
+@pytest.fixture
+def warehouse_inventory():
+    inventory = Inventory([Warehouse("North", distance=10), Warehouse("South", distance=50)])
+    laptop = Product("Laptop", price=1000.0, quantity=0)
+    phone = Product("Phone", price=500.0, quantity=0)
+    inventory.set_quantity(laptop, "North", 2)
+    inventory.set_quantity(laptop, "South", 5)
+    inventory.set_quantity(phone, "South", 4)
+    return inventory, laptop, phone
+
+
+def test_inventory_aggregates_warehouses(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    assert laptop.quantity == 7
+    assert inventory.get_quantity("Laptop", "North") == 2
+    assert inventory.get_total_quantity() == 11
+    store = Store([laptop, phone, Product("Cable", price=5.0, quantity=3)], inventory)
+    assert store.get_total_quantity() == 14
+
+
+def test_route_fewest_shipments(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    shipments = inventory.route([(laptop, 2), (phone, 1)])
+    assert shipments == {"South": [("Laptop", 2), ("Phone", 1)]}
+
+
+def test_route_nearest_first(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    shipments = inventory.route([(laptop, 3)], NEAREST_FIRST)
+    assert shipments == {"North": [("Laptop", 2)], "South": [("Laptop", 1)]}
+    with pytest.raises(ValueError):
+        inventory.route([(laptop, 8)])
+
+
+def test_order_deducts_warehouse_stock(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    store = Store([laptop, phone], inventory, routing_strategy=NEAREST_FIRST)
+    store.order([(laptop, 3)])
+    assert inventory.get_quantity("Laptop", "North") == 0
+    assert inventory.get_quantity("Laptop", "South") == 4
+    assert laptop.quantity == 4
+
+
+def test_store_addition_merges_warehouse_stock():
+    laptop_a = Product("Laptop", price=1000.0, quantity=0)
+    laptop_b = Product("Laptop", price=1000.0, quantity=0)
+    inventory_a = Inventory([Warehouse("North", distance=10)])
+    inventory_b = Inventory([Warehouse("South", distance=50)])
+    inventory_a.set_quantity(laptop_a, "North", 2)
+    inventory_b.set_quantity(laptop_b, "South", 3)
+    store_a = Store([laptop_a], inventory_a, routing_strategy=NEAREST_FIRST)
+    combined_store = store_a + Store([laptop_b], inventory_b)
+    assert [product.name for product in combined_store.get_all_products()] == ["Laptop"]
+    assert combined_store.get_total_quantity() == 5
+    assert laptop_a.quantity == 2
+    assert inventory_a.get_total_quantity() == 2
+
+    combined_store.order([(laptop_a, 2)])
+    assert inventory_a.get_quantity("Laptop", "North") == 0
+    assert laptop_a.quantity == 0
+    assert combined_store.get_total_quantity() == 3
+    with pytest.raises(Exception):
+        store_a.order([(laptop_a, 2)])
+    assert inventory_b.get_total_quantity() == 3
+
+
+def test_failed_order_changes_no_stock(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    inactive = Product("Inactive", price=1.0, quantity=5)
+    inactive.deactivate()
+    store = Store([laptop, phone, inactive], inventory)
+    with pytest.raises(Exception):
+        store.order([(laptop, 2), (inactive, 1)])
+    assert laptop.quantity == 7
+    assert inventory.get_quantity("Laptop") == 7
+
+
+def test_route_rejects_non_positive_quantities(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    with pytest.raises(ValueError):
+        inventory.route([(laptop, -3)])
+    with pytest.raises(ValueError):
+        inventory.fulfill({"North": [("Laptop", -3)]})
+    assert inventory.get_quantity("Laptop") == 7
+
+
+def test_snapshot_is_point_in_time(store_with_products):
+    product1, product2, product3 = store_with_products.products
+    snapshot = store_with_products.snapshot()
+    store_with_products.order([(product1, 10)])
+    product2.promotion = PercentageDiscount("10% off", 10)
+    product3.deactivate()
+    store_with_products.bulk_update(prices={"Product 2": 25.0})
+    store_with_products.add_product(Product("Product 4", price=40.0, quantity=30))
+    assert snapshot.get_total_quantity() == 150
+    assert len(snapshot) == 3
+    assert [record.quantity for record in snapshot.get_all_products()] == [100, 50, 0]
+    assert snapshot.calculate_discounted_price([(product2, 2)]) == pytest.approx(40.0)
+    assert store_with_products.get_total_quantity() == 170
+
+
+def test_snapshot_history_is_released(store_with_products):
+    product1 = store_with_products.products[0]
+    snapshot = store_with_products.snapshot()
+    product1.quantity = 90
+    product1.quantity = 80
+    assert snapshot.get_record(product1).quantity == 100
+    del snapshot
+    later_snapshot = store_with_products.snapshot()
+    product1.quantity = 70
+    assert later_snapshot.get_record(product1).quantity == 80
+    assert len(product1._history) == 1
+
+
+def test_restock_reactivates_product():
+    product = Product("Test Product", price=10.0, quantity=1)
+    product.buy(1)
+    assert not product.is_active()
+    product.quantity = 5
+    assert product.is_active()
+    product.deactivate()
+    product.quantity = 10
+    assert not product.is_active()
+
+
+def test_bulk_update(store_with_products):
+    product1, product2, product3 = store_with_products.products
+    product2.quantity = 0
+    changed = store_with_products.bulk_update(
+        [("Product 1", -10), ("Product 2", 5), ("Product 1", 3), ("Product 3", 2)],
+        {"Product 1": 12.0})
+    assert changed == 3
+    assert product1.quantity == 93
+    assert product1.price == 12.0
+    assert product2.quantity == 5
+    assert product2.is_active()
+    assert product3.is_active()
+
+
+def test_bulk_update_validates_whole_batch(store_with_products):
+    product1 = store_with_products.products[0]
+    with pytest.raises(ValueError):
+        store_with_products.bulk_update([("Product 1", 5), ("Product 2", -60)])
+    with pytest.raises(ValueError):
+        store_with_products.bulk_update([("Product 1", 5)], [("Missing", 1.0)])
+    assert product1.quantity == 100
+
+
+def test_bulk_update_restocks_warehouse(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    store = Store([laptop, phone], inventory)
+    store.bulk_update({"Laptop": 3}, warehouse_name="North")
+    assert inventory.get_quantity("Laptop", "North") == 5
+    assert laptop.quantity == 10
+
+
+def test_order_with_idempotency_key(store_with_products):
+    product1, product2, _ = store_with_products.products
+    first = store_with_products.order([(product1, 10), (product2, 5)], idempotency_key="order-1")
+    retry = store_with_products.order([(product1, 10), (product2, 5)], idempotency_key="order-1")
+    assert retry == first
+    assert product1.quantity == 90
+    store_with_products.order([(product1, 10)], idempotency_key="order-2")
+    assert product1.quantity == 80
+
+
+def test_idempotency_cache_is_bounded():
+    now = [0.0]
+    cache = IdempotencyCache(max_size=2, ttl=10.0, clock=lambda: now[0])
+    for key in "abc":
+        cache.reserve(key, key)
+        cache.complete(key, key.upper())
+    assert "a" not in cache
+    assert cache.get("b") == "B"
+    now[0] = 11.0
+    assert cache.get("c") is None
+    assert len(cache) == 0
+
+
+def test_idempotency_reservations_are_not_evicted():
+    cache = IdempotencyCache(max_size=1)
+    assert cache.reserve("a", "cart a") is None
+    cache.reserve("b", "cart b")
+    cache.complete("b", "B")
+    with pytest.raises(RuntimeError):
+        cache.reserve("a", "cart a")
+    cache.complete("a", "A")
+    assert cache.reserve("a", "cart a") == "A"
+
+
+def test_products_have_no_instance_dict():
+    for product in (Product("Product", price=10.0, quantity=1),
+                    NonStockedProduct("Non-Stocked Product", price=10.0),
+                    LimitedProduct("Limited Product", price=10.0, quantity=1, maximum=1)):
+        assert not hasattr(product, "__dict__")
+
+
+def test_intern_promotion_shares_equal_promotions():
+    discount = intern_promotion(PercentageDiscount, "20% off", 20)
+    assert intern_promotion(PercentageDiscount, "20% off", 20) is discount
+    assert intern_promotion(PercentageDiscount, "10% off", 10) is not discount
+    assert intern_promotion(BuyTwoGetOneFree, "20% off") is not discount
+
+
+def test_snapshot_ignores_in_place_catalog_changes(store_with_products):
+    snapshot = store_with_products.snapshot()
+    store_with_products.products.append(Product("Product 4", price=40.0, quantity=30))
+    store_with_products.products.remove(store_with_products.products[0])
+    assert len(snapshot) == 3
+    assert snapshot.get_total_quantity() == 150
+
+
+def test_snapshot_records_format_like_products():
+    products = [Product("Product", price=10.0, quantity=5),
+                NonStockedProduct("Non-Stocked Product", price=20.0),
+                LimitedProduct("Limited Product", price=30.0, quantity=3, maximum=1)]
+    snapshot = Store(products).snapshot()
+    assert [str(record) for record in snapshot.get_all_products()] == [str(product) for product in products]
+
+
+def test_idempotency_key_is_tied_to_shopping_list(store_with_products):
+    product1 = store_with_products.products[0]
+    store_with_products.order([(product1, 1)], idempotency_key="k")
+    with pytest.raises(ValueError):
+        store_with_products.order([(product1, 50)], idempotency_key="k")
+    assert product1.quantity == 99
+
+
+def test_idempotency_key_is_reserved_while_in_flight(store_with_products):
+    product1, product2, product3 = store_with_products.products
+    store_with_products.order_results.reserve("k", ((product1.name, 1),))
+    with pytest.raises(RuntimeError):
+        store_with_products.order([(product1, 1)], idempotency_key="k")
+    assert product1.quantity == 100
+    with pytest.raises(Exception):
+        store_with_products.order([(product3, 1)], idempotency_key="failed")
+    assert "failed" not in store_with_products.order_results
+
+
+def test_shared_promotions_are_read_only():
+    discount = intern_promotion(PercentageDiscount, "20% off", 20)
+    with pytest.raises(AttributeError):
+        discount.discount_percent = 50
+    with pytest.raises(AttributeError):
+        discount.name = "50% off"
+
+
+def test_order_untracked_product_from_store_with_inventory(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    cable = Product("Cable", price=5.0, quantity=3)
+    store = Store([laptop, cable], inventory)
+    assert float(store.order([(cable, 1)]).split('$')[1]) == 5.0
+    assert cable.quantity == 2
+    assert inventory.route([]) == {}
+
+
+def test_total_quantity_after_removing_stocked_product(warehouse_inventory):
+    inventory, laptop, phone = warehouse_inventory
+    store = Store([laptop, phone, Product("Cable", price=5.0, quantity=3)], inventory)
+    store.remove_product(laptop)
+    assert store.get_total_quantity() == 7
+
+
+class RecordingProduct(Product):
+    """A product that records every quantity written to it."""
+    __slots__ = ("written",)
+
+    @Product.quantity.setter
+    def quantity(self, value):
+        self.written.append(value)
+        Product.quantity.fset(self, value)
+
+
+def test_order_updates_stocked_product_once():
+    inventory = Inventory([Warehouse("North", distance=10), Warehouse("South", distance=50)])
+    laptop = RecordingProduct("Laptop", price=1000.0, quantity=0)
+    laptop.written = []
+    inventory.set_quantity(laptop, "North", 2)
+    inventory.set_quantity(laptop, "South", 5)
+    laptop.written.clear()
+    Store([laptop], inventory).order([(laptop, 7)])
+    assert laptop.written == [0]
+    assert not laptop.is_active()
+
+
+def test_snapshot_rejects_products_created_later(store_with_products):
+    snapshot = store_with_products.snapshot()
+    later = Product("Product 4", price=40.0, quantity=30)
+    with pytest.raises(ValueError, match="not in the snapshot"):
+        snapshot.calculate_discounted_price([(later, 1)])
+
+
+def test_bulk_update_rejects_non_stocked_and_ambiguous_products():
+    license_product = NonStockedProduct("License", price=100.0)
+    store = Store([license_product]) + Store([Product("Cable", price=5.0, quantity=1)]) \
+        + Store([Product("Cable", price=6.0, quantity=2)])
+    with pytest.raises(ValueError):
+        store.bulk_update({"License": 5})
+    with pytest.raises(ValueError):
+        store.bulk_update({"Cable": 5})
+    assert store.bulk_update(prices={"License": 90.0}) == 1
+    assert license_product.price == 90.0